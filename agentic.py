@@ -3,17 +3,28 @@ from __future__ import annotations
 import os
 import re
 import sys
+import json
+import asyncio
+import hashlib
+import random
+import threading
+import time
 import httpx
+import orjson
 import argparse
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import Annotated, List, Dict, Any
 from dotenv import load_dotenv
+from pydantic import BaseModel, Field, StringConstraints, field_validator
 
-from langchain_ollama import ChatOllama
 from langchain_core.tools import tool
-from langgraph.prebuilt import create_react_agent 
 
-load_dotenv() 
+# ChatOllama e create_react_agent são importados dentro de _build_agent():
+# juntos puxam a stack LangChain inteira (~segundos de import a frio) que
+# um `--help` ou um hit no cache de specs nem chega a usar.
+
+load_dotenv()
 
 TRELLO_KEY = os.getenv("TRELLO_KEY")
 TRELLO_TOKEN = os.getenv("TRELLO_TOKEN")
@@ -21,6 +32,93 @@ TRELLO_TOKEN = os.getenv("TRELLO_TOKEN")
 ENV_DEFAULT_BOARD = os.getenv("DEFAULT_BOARD", "").strip()
 ENV_DEFAULT_LIST = os.getenv("DEFAULT_LIST", "").strip()
 
+# ========= Rate limit + retry =========
+class _RateLimiter:
+    """
+    Token bucket de 90 req/10s, proativamente abaixo do teto de 100 req/10s
+    por key do Trello, para quase nunca ver um 429.
+    """
+    def __init__(self, rate: int = 90, per: float = 10.0):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Reserva um token e retorna quantos segundos esperar antes de usá-lo."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens * self.per / self.rate
+
+    async def acquire_async(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+_RATE = _RateLimiter()
+
+_RETRY_STATUS = (429, 502, 503, 504)
+_RETRY_ATTEMPTS = 5
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Respeita Retry-After quando o Trello manda; senão backoff exponencial com jitter."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(float(retry_after), 30.0)
+        except ValueError:
+            pass
+    return 2 ** attempt * 0.25 + random.random() * 0.25
+
+class _AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """Retry de 429/5xx transitórios: converte falha flaky em alguns ms de sleep."""
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(_RETRY_ATTEMPTS):
+            # cada tentativa consome um token: retries (inclusive de 429)
+            # também respeitam o shaping
+            await _RATE.acquire_async()
+            response = await self._inner.handle_async_request(request)
+            if response.status_code not in _RETRY_STATUS or attempt == _RETRY_ATTEMPTS - 1:
+                return response
+            await response.aclose()
+            await asyncio.sleep(_retry_delay(response, attempt))
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+# Cliente HTTP compartilhado: mantém conexões keep-alive com api.trello.com,
+# evitando um handshake TCP+TLS novo a cada chamada de ferramenta.
+# key/token já vão como params default, então as ferramentas não repetem os dois.
+_TRELLO = httpx.AsyncClient(
+    base_url="https://api.trello.com/1",
+    params={"key": TRELLO_KEY, "token": TRELLO_TOKEN},
+    timeout=30,
+    transport=_AsyncRetryTransport(
+        httpx.AsyncHTTPTransport(
+            retries=3,
+            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+        )
+    ),
+)
+
+# Regexes compiladas uma vez no import (caminho quente do agente).
+_TZ_RE = re.compile(r"([+-]\d{2}:\d{2})")
+_HM_RE = re.compile(r"(\d{1,2}):(\d{2})")
+_YMD_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_BOARD_RE = re.compile(r"/b/([A-Za-z0-9]+)/")
+
+_ONE_DAY = timedelta(days=1)
+
 # ========= Helpers =========
 def _to_rfc3339_from_text(text: str) -> str:
     """
@@ -35,121 +133,378 @@ def _to_rfc3339_from_text(text: str) -> str:
     if not s:
         raise ValueError("Texto de data/hora vazio.")
 
-    m_tz = re.search(r"([+-]\d{2}:\d{2})", s)
+    m_tz = _TZ_RE.search(s)
     tz = m_tz.group(1) if m_tz else "-03:00"
 
-    m_hm = re.search(r"(\d{1,2}):(\d{2})", s)
+    m_hm = _HM_RE.search(s)
     hh, mm = (int(m_hm.group(1)), int(m_hm.group(2))) if m_hm else (9, 0)
 
     now = datetime.now()
+    m_ymd = _YMD_RE.search(s)
     if "amanhã" in s:
-        dt = (now + timedelta(days=1)).replace(hour=hh, minute=mm, second=0, microsecond=0)
-    elif re.search(r"\d{4}-\d{2}-\d{2}", s):
-        y, m, d = map(int, re.search(r"(\d{4})-(\d{2})-(\d{2})", s).groups())
+        dt = now.replace(hour=hh, minute=mm, second=0, microsecond=0) + _ONE_DAY
+    elif m_ymd:
+        y, m, d = map(int, m_ymd.groups())
         dt = datetime(y, m, d, hh, mm, 0)
     else:
         # "hoje" ou texto sem data vira hoje
         dt = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
 
-    return dt.strftime("%Y-%m-%dT%H:%M:%S") + tz
+    return f"{dt:%Y-%m-%dT%H:%M:%S}{tz}"
 
 def _board_shortlink(board_ref: str) -> str:
     """Aceita URL (https://trello.com/b/<short>/<nome>) ou shortlink. Retorna o shortlink."""
-    m = re.search(r"/b/([A-Za-z0-9]+)/", board_ref)
+    m = _BOARD_RE.search(board_ref)
     return m.group(1) if m else board_ref
 
-def _get_list_id(board_ref: str, list_name: str) -> str:
+# TTL do cache de listas: dentro de uma sessão o conjunto de listas do board
+# quase não muda; 5 minutos tolera edições feitas no meio do caminho.
+_LISTS_TTL_S = 300
+
+# lru_cache não compõe com corrotinas; cache explícito keyado por (short, epoch).
+_board_lists_cache: Dict[tuple[str, int], tuple[tuple[str, str], ...]] = {}
+
+# single-flight: fetches concorrentes do mesmo board (ex.: warmup + tool call)
+# compartilham uma única task em vez de disparar GETs idênticos.
+_inflight_fetches: Dict[tuple[str, int], asyncio.Task] = {}
+
+async def _do_fetch_board_lists(short: str, key: tuple[str, int]) -> tuple[tuple[str, str], ...]:
+    r = await _TRELLO.get(f"/boards/{short}/lists", params={"fields": "name,id"})
+    r.raise_for_status()
+    lists = tuple((lst["name"].strip().lower(), lst["id"]) for lst in orjson.loads(r.content))
+    if len(_board_lists_cache) >= 256:
+        _board_lists_cache.clear()
+    _board_lists_cache[key] = lists
+    return lists
+
+async def _fetch_board_lists(short: str, epoch: int) -> tuple[tuple[str, str], ...]:
+    """
+    Busca (nome_lower, id) das listas do board, memoizado por shortlink.
+    'epoch' muda a cada _LISTS_TTL_S segundos, expirando entradas antigas.
+    """
+    key = (short, epoch)
+    hit = _board_lists_cache.get(key)
+    if hit is not None:
+        return hit
+    task = _inflight_fetches.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_do_fetch_board_lists(short, key))
+        _inflight_fetches[key] = task
+        task.add_done_callback(lambda _t: _inflight_fetches.pop(key, None))
+    return await task
+
+async def _get_list_id(board_ref: str, list_name: str) -> str:
     """Busca o id da lista pelo nome dentro do board (shortlink/URL). Case-insensitive, tenta exact e contains."""
     short = _board_shortlink(board_ref)
-    r = httpx.get(
-        f"https://api.trello.com/1/boards/{short}/lists",
-        params={"fields": "name,id", "key": TRELLO_KEY, "token": TRELLO_TOKEN},
-        timeout=30,
-    )
-    r.raise_for_status()
-    lists = r.json()
-    # exact
-    for lst in lists:
-        if lst["name"].strip().lower() == list_name.strip().lower():
-            return lst["id"]
-    # contains
-    for lst in lists:
-        if list_name.strip().lower() in lst["name"].strip().lower():
-            return lst["id"]
+    lists = await _fetch_board_lists(short, int(time.monotonic() // _LISTS_TTL_S))
+    target = list_name.strip().lower()
+    # passada única: retorna no exact e guarda o primeiro contains como fallback
+    fallback = None
+    for nm, list_id in lists:
+        if nm == target:
+            return list_id
+        if fallback is None and target in nm:
+            fallback = list_id
+    if fallback is not None:
+        return fallback
     raise ValueError(f"Lista '{list_name}' não encontrada no board {board_ref}")
 
+async def _resolve_board_and_list(board: str, list_name: str) -> str:
+    """Aplica os defaults do host a (board, list_name) e devolve o idList."""
+    _board = (board or "").strip() or ENV_DEFAULT_BOARD
+    _list = (list_name or "").strip() or ENV_DEFAULT_LIST
+    if not _board or not _list:
+        raise ValueError(
+            "Board e lista não informados. Passe via CLI (--board/--list) ou defina DEFAULT_BOARD/DEFAULT_LIST no .env."
+        )
+    return await _get_list_id(_board, _list)
+
+# ========= Templates de checklist (clone via idChecklistSource) =========
+# O Trello clona um checklist inteiro em UM POST com idChecklistSource. Todo
+# checklist criado item a item vira "template": o id fica registrado em disco
+# keyado pelo hash dos itens, e um conjunto repetido passa a custar 1 POST em
+# vez de 1 + N.
+_TPL_DB_PATH = Path(os.path.expanduser("~/.cache/trello_agent/checklist_templates.json"))
+_tpl_db: Dict[str, str] | None = None
+
+def _tpl_key(items: List[str]) -> str:
+    return hashlib.sha256("\n".join(sorted(items)).encode("utf-8")).hexdigest()
+
+def _tpl_db_load() -> Dict[str, str]:
+    global _tpl_db
+    if _tpl_db is None:
+        try:
+            _tpl_db = json.loads(_TPL_DB_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            _tpl_db = {}
+    return _tpl_db
+
+def _tpl_db_save() -> None:
+    try:
+        _TPL_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _TPL_DB_PATH.write_text(json.dumps(_tpl_db), encoding="utf-8")
+    except OSError:
+        pass  # registro é best-effort; nunca derruba o run
+
+async def _tpl_source_matches(source_id: str, items: List[str]) -> bool:
+    """
+    Confere se o checklist de origem ainda tem exatamente os itens esperados,
+    todos desmarcados. O template vive num card real: o usuário pode ter
+    editado ou marcado itens, e um clone carregaria essa deriva adiante.
+    Um GET de verificação ainda sai mais barato que os N POSTs que o clone evita.
+    """
+    try:
+        r = await _TRELLO.get(f"/checklists/{source_id}/checkItems", params={"fields": "name,state"})
+    except httpx.HTTPError:
+        return False
+    if not r.is_success:
+        return False
+    checkitems = orjson.loads(r.content)
+    if any(ci.get("state") != "incomplete" for ci in checkitems):
+        return False
+    return sorted(ci.get("name", "").strip() for ci in checkitems) == sorted(items)
+
+async def _create_checklist(sem: asyncio.Semaphore, card_id: str, name: str, items: List[str]) -> None:
+    """Cria um checklist e posta seus itens em paralelo (ou clona um template)."""
+    items = [it.strip() for it in items if it and it.strip()]
+    key = _tpl_key(items) if items else None
+
+    if key is not None:
+        source_id = _tpl_db_load().get(key)
+        if source_id and await _tpl_source_matches(source_id, items):
+            rc = await _TRELLO.post(
+                "/checklists",
+                params={"idCard": card_id, "name": name, "idChecklistSource": source_id, "fields": "id"},
+            )
+            if rc.is_success:
+                return
+        # template sumiu ou foi editado pelo usuário: cria do zero abaixo
+        # (o registro é reapontado para o checklist novo no fim)
+
+    rc = await _TRELLO.post("/checklists", params={"idCard": card_id, "name": name, "fields": "id"})
+    rc.raise_for_status()
+    checklist_id = orjson.loads(rc.content).get("id")
+
+    async def _post_item(it: str) -> None:
+        async with sem:
+            r = await _TRELLO.post(f"/checklists/{checklist_id}/checkItems", params={"name": it})
+            r.raise_for_status()
+
+    await asyncio.gather(*[_post_item(it) for it in items])
+
+    if key is not None:
+        _tpl_db_load()[key] = checklist_id
+        _tpl_db_save()
+
+async def _post_checkitems(checklist_id: str, items: List[str]) -> None:
+    """
+    Dispara os POSTs de checkItems em paralelo (os itens são independentes;
+    o Trello define 'pos' sozinho). Semáforo de 8 para ficar bem abaixo do
+    limite de 100 req/10s por key do Trello.
+    """
+    sem = asyncio.Semaphore(8)
+
+    async def _post_one(name: str) -> None:
+        async with sem:
+            r = await _TRELLO.post(
+                f"/checklists/{checklist_id}/checkItems",
+                params={"name": name},
+            )
+            r.raise_for_status()
+
+    await asyncio.gather(*[_post_one(it) for it in items])
+
+async def _publish_checklists(card_id: str, checklists: Dict[str, List[str]]) -> None:
+    """Cria todos os checklists (e seus itens) de um card concorrentemente."""
+    sem = asyncio.Semaphore(8)
+    await asyncio.gather(
+        *[_create_checklist(sem, card_id, name, items) for name, items in checklists.items()]
+    )
+
+# ========= Schemas de entrada das ferramentas =========
+# Validação na fronteira da ferramenta via pydantic-core (Rust): strip e
+# checagem de vazio acontecem uma vez só, em vez de string ops no corpo.
+_StrippedStr = Annotated[str, StringConstraints(strip_whitespace=True)]
+_NonEmptyStr = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+
+class ResolveListArgs(BaseModel):
+    """Argumentos de 'resolve_list_id'."""
+    board: _StrippedStr = Field("", description="URL ou shortlink do board; vazio usa o default do host.")
+    list_name: _StrippedStr = Field("", description="Nome da lista; vazio usa o default do host.")
+
+class ChecklistArgs(BaseModel):
+    """Argumentos de 'trello_add_checklist'."""
+    card_id: _NonEmptyStr
+    checklist_name: _NonEmptyStr = Field(description="Nome do checklist (ex.: 'Tarefas')")
+    items: List[str] = Field(description="Itens do checklist (strings)")
+
+    @field_validator("items", mode="before")
+    @classmethod
+    def _clean_items(cls, v: Any) -> Any:
+        # roda ANTES da validação de tipo: item None/vazio vindo do LLM é
+        # descartado em vez de rejeitar a chamada inteira
+        if isinstance(v, list):
+            return [it.strip() for it in v if isinstance(it, str) and it.strip()]
+        return v
+
 @tool
-def to_rfc3339(datetime_text: str) -> str:
+async def to_rfc3339(datetime_text: str) -> str:
     """Converte uma expressão de data/hora (ex: 'amanhã 18:00-03:00') para RFC3339."""
     return _to_rfc3339_from_text(datetime_text)
 
-@tool
-def resolve_list_id(board: str, list_name: str) -> str:
+@tool(args_schema=ResolveListArgs)
+async def resolve_list_id(board: str, list_name: str) -> str:
     """
-    Retorna o idList a partir de (board, list_name).
+    (Avançado) Retorna o idList a partir de (board, list_name).
     'board' pode ser URL do board ou shortlink. Se algum vier vazio, usa defaults do host.
+    Para o fluxo completo de criação, prefira 'trello_publish_card'.
     """
-    _board = board.strip() or ENV_DEFAULT_BOARD
-    _list = list_name.strip() or ENV_DEFAULT_LIST
-    if not _board or not _list:
-        raise ValueError(
-            "Board e lista não informados. Passe via CLI (--board/--list) ou defina DEFAULT_BOARD/DEFAULT_LIST no .env."
+    return await _resolve_board_and_list(board, list_name)
+
+async def _publish_card(
+    board: str,
+    list_name: str,
+    name: str,
+    desc: str = "",
+    due_text: str | None = None,
+    checklists: Dict[str, List[str]] | None = None,
+) -> str:
+    """Fluxo completo resolve->card->checklists. Retorna a URL do card."""
+    list_id = await _resolve_board_and_list(board, list_name)
+
+    # 'fields' projeta a resposta: só precisamos de id/url, não do card inteiro
+    params = {"idList": list_id, "name": name, "desc": desc, "fields": "id,url"}
+    if due_text and due_text.strip():
+        params["due"] = _to_rfc3339_from_text(due_text)
+
+    r = await _TRELLO.post("/cards", params=params)
+    r.raise_for_status()
+    data = orjson.loads(r.content)
+    card_id, card_url = data.get("id"), data.get("url")
+
+    if checklists:
+        await _publish_checklists(card_id, checklists)
+
+    global _last_spec, _last_card_url
+    _last_spec = {
+        "board": board,
+        "list_name": list_name,
+        "name": name,
+        "desc": desc,
+        "due_text": due_text,
+        "checklists": checklists,
+    }
+    _last_card_url = card_url
+    return card_url
+
+@tool
+async def trello_publish_card(
+    board: str,
+    list_name: str,
+    name: str,
+    desc: str = "",
+    due_text: str | None = None,
+    checklists: Dict[str, List[str]] | None = None,
+) -> str:
+    """
+    Publica um card completo em UMA chamada: resolve a lista, cria o card
+    (com descrição e prazo) e adiciona todos os checklists.
+    - board/list_name: URL/shortlink e nome da lista; vazios usam os defaults do host.
+    - name: título curto do card.
+    - desc: descrição técnica (markdown/bullets).
+    - due_text: data/hora em linguagem natural (ex.: 'amanhã 18:00-03:00'); opcional.
+    - checklists: dict {nome_do_checklist: [itens]}; opcional.
+    Retorna a URL do card criado.
+    """
+    return await _publish_card(board, list_name, name, desc, due_text, checklists)
+
+# ========= Cache de specs (prompt -> card) =========
+# Com temperature=0 o mesmo prompt gera praticamente o mesmo card, então o
+# spec emitido pelo LLM é salvo em disco e runs repetidos pulam a geração
+# inteira (a chamada ao LLM domina a latência do módulo).
+_SPEC_CACHE_DIR = Path(os.path.expanduser("~/.cache/trello_agent"))
+_SPEC_CACHE_MAX_AGE_S = 30 * 24 * 3600  # 30 dias
+
+# Último spec publicado no run atual; main() grava no cache após o sucesso.
+# A URL fica guardada à parte para reportar o card mesmo se o LLM falhar depois.
+_last_spec: Dict[str, Any] | None = None
+_last_card_url: str | None = None
+
+def _spec_cache_key(model: str, system_msg: str, user_prompt: str) -> str:
+    raw = f"{model}\n{system_msg}\n{user_prompt}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+def _spec_cache_get(key: str) -> Dict[str, Any] | None:
+    path = _SPEC_CACHE_DIR / f"{key}.json"
+    try:
+        if time.time() - path.stat().st_mtime > _SPEC_CACHE_MAX_AGE_S:
+            path.unlink(missing_ok=True)
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def _spec_cache_put(key: str, spec: Dict[str, Any]) -> None:
+    try:
+        _SPEC_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        (_SPEC_CACHE_DIR / f"{key}.json").write_text(
+            json.dumps(spec, ensure_ascii=False), encoding="utf-8"
         )
-    return _get_list_id(_board, _list)
+    except OSError:
+        pass  # cache é best-effort; nunca derruba o run
 
 @tool
-def trello_create_card(list_id: str, name: str, desc: str = "", due: str | None = None) -> Dict[str, Any]:
+async def trello_create_card(list_id: str, name: str, desc: str = "", due: str | None = None) -> Dict[str, Any]:
     """
-    Cria um card no Trello. Args: list_id, name, desc, due (RFC3339).
+    (Avançado) Cria um card no Trello. Args: list_id, name, desc, due (RFC3339).
     Retorna {'id': <card_id>, 'url': <card_url>}.
+    Para o fluxo completo de criação, prefira 'trello_publish_card'.
     """
-    params = {"key": TRELLO_KEY, "token": TRELLO_TOKEN, "idList": list_id, "name": name, "desc": desc}
+    params = {"idList": list_id, "name": name, "desc": desc, "fields": "id,url"}
     if due:
         params["due"] = due
-    r = httpx.post("https://api.trello.com/1/cards", params=params, timeout=30)
+    r = await _TRELLO.post("/cards", params=params)
     r.raise_for_status()
-    data = r.json()
+    data = orjson.loads(r.content)
     return {"id": data.get("id"), "url": data.get("url")}
 
 @tool
-def trello_set_desc(card_id: str, desc: str) -> str:
-    """Atualiza a descrição de um card existente."""
-    r = httpx.put(
-        f"https://api.trello.com/1/cards/{card_id}",
-        params={"key": TRELLO_KEY, "token": TRELLO_TOKEN, "desc": desc},
-        timeout=30,
-    )
+async def trello_set_desc(card_id: str, desc: str) -> str:
+    """(Avançado) Atualiza a descrição de um card existente."""
+    r = await _TRELLO.put(f"/cards/{card_id}", params={"desc": desc})
     r.raise_for_status()
     return "Descrição atualizada"
 
-@tool
-def trello_add_checklist(card_id: str, checklist_name: str, items: List[str]) -> str:
+@tool(args_schema=ChecklistArgs)
+async def trello_add_checklist(card_id: str, checklist_name: str, items: List[str]) -> str:
     """
-    Cria um checklist no card e adiciona itens.
-    - checklist_name: nome do checklist (ex.: 'Tarefas')
-    - items: lista de itens (strings)
+    (Avançado) Cria um checklist no card e adiciona itens.
+    Para o fluxo completo de criação, prefira 'trello_publish_card'.
     """
-    rc = httpx.post(
-        "https://api.trello.com/1/checklists",
-        params={"key": TRELLO_KEY, "token": TRELLO_TOKEN, "idCard": card_id, "name": checklist_name},
-        timeout=30,
-    )
+    rc = await _TRELLO.post("/checklists", params={"idCard": card_id, "name": checklist_name, "fields": "id"})
     rc.raise_for_status()
-    checklist_id = rc.json().get("id")
+    checklist_id = orjson.loads(rc.content).get("id")
 
-    for it in items:
-        it = (it or "").strip()
-        if not it:
-            continue
-        ri = httpx.post(
-            f"https://api.trello.com/1/checklists/{checklist_id}/checkItems",
-            params={"key": TRELLO_KEY, "token": TRELLO_TOKEN, "name": it},
-            timeout=30,
-        )
-        ri.raise_for_status()
+    # items já chegam limpos/filtrados pelo args_schema
+    if items:
+        await _post_checkitems(checklist_id, items)
 
     return f"Checklist '{checklist_name}' criado com {len(items)} itens"
 
+# System prompt como constante byte-idêntica entre runs: qualquer interpolação
+# aqui mudaria o prefixo e invalidaria o KV-cache de prefixo do servidor de
+# inferência. Board/lista vão na mensagem do usuário.
+SYSTEM_MSG = (
+    "Você é um agente de produtividade Trello. NÃO peça key/token.\n"
+    "Use o board e a lista indicados na mensagem do usuário.\n"
+    "1. Gere um título curto para o card.\n"
+    "2. Gere descrição técnica em bullets (objetivos, entregáveis, critérios de aceite, riscos).\n"
+    "3. Gere 1-3 checklists com 4-10 itens verificáveis.\n"
+    "4. Publique tudo com UMA chamada de 'trello_publish_card' (inclua o prazo em linguagem natural, se houver).\n"
+    "5. Só use as ferramentas avançadas se 'trello_publish_card' falhar.\n"
+    "Responda SOMENTE a URL do card."
+)
+
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(
         description="Agente Trello: gera cards profissionais (título, descrição e checklists) a partir de um prompt."
@@ -159,60 +514,139 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--list", dest="list_name", help="Nome da lista. Se ausente, usa DEFAULT_LIST do .env.", default=None)
     p.add_argument("--due", help="Prazo em linguagem natural (ex.: 'amanhã 18:00-03:00').", default=None)
     p.add_argument("--model", help="Modelo Ollama (default: gpt-oss:20b).", default=os.getenv("OLLAMA_MODEL", "gpt-oss:20b"))
+    p.add_argument(
+        "--draft-model",
+        dest="draft_model",
+        help="Modelo rascunho, mais rápido, tentado antes do --model (default: llama3.2:3b; use '' para desativar).",
+        default=os.getenv("OLLAMA_DRAFT_MODEL", "llama3.2:3b"),
+    )
     p.add_argument("--temperature", type=float, help="Temperatura do LLM (default: 0).", default=float(os.getenv("LLM_TEMPERATURE", "0")))
     p.add_argument("--verbose", action="store_true", help="Exibe logs do agente (útil para debug).")
     return p.parse_args()
 
-def main():
+def _build_agent(args: argparse.Namespace, model: str):
+    """Importa a stack LangChain (pesada) e monta o agente; só roda em cache miss."""
+    from langchain_ollama import ChatOllama
+    from langgraph.prebuilt import create_react_agent
+
+    llm = ChatOllama(
+        model=model,
+        temperature=args.temperature,
+        num_ctx=4096,
+        num_predict=800,  # teto de geração: um card cabe folgado e limita a cauda de latência
+        top_p=0.9,
+        repeat_penalty=1.05,
+        keep_alive="30m",  # mantém o modelo residente entre runs consecutivos
+    )
+    tools = [trello_publish_card, to_rfc3339, resolve_list_id, trello_create_card, trello_set_desc, trello_add_checklist]
+    return create_react_agent(llm, tools=tools)
+
+async def _stream_agent(agent, messages, verbose: bool) -> str:
+    """
+    Executa o agente em streaming, imprimindo progresso em stderr conforme os
+    eventos chegam (chamadas de ferramenta e texto do assistente), em vez de
+    ficar mudo até o loop ReAct acabar. stdout continua recebendo só a URL
+    final. Retorna o texto da última mensagem do assistente.
+    """
+    final_text = ""
+    async for event in agent.astream({"messages": messages}, stream_mode="updates"):
+        for node_output in event.values():
+            for msg in (node_output or {}).get("messages", []):
+                for tc in getattr(msg, "tool_calls", None) or []:
+                    if verbose:
+                        print(f"[tool] {tc['name']}({tc.get('args')})", file=sys.stderr)
+                    else:
+                        print(f"[tool] {tc['name']}", file=sys.stderr)
+                content = getattr(msg, "content", "")
+                if content and isinstance(content, str):
+                    print(content, file=sys.stderr)
+                    if getattr(msg, "type", "") == "ai":
+                        final_text = content
+    return final_text
+
+async def main():
     if not TRELLO_KEY or not TRELLO_TOKEN:
         print("ERRO: Defina TRELLO_KEY e TRELLO_TOKEN no .env ou ambiente.")
         sys.exit(1)
 
     args = parse_args()
 
-    # prepara LLM
-    llm = ChatOllama(model=args.model, temperature=args.temperature)
-
-    # agenda ferramentas
-    tools = [to_rfc3339, resolve_list_id, trello_create_card, trello_set_desc, trello_add_checklist]
-    agent = create_react_agent(llm, tools=tools)
-
-    # system message profissional
-    system_msg = (
-        "Você é um agente de produtividade. NÃO peça key/token; já estão no ambiente. "
-        f"Se o usuário não informar board/lista nas mensagens, use board '{args.board or ENV_DEFAULT_BOARD}' "
-        f"e lista '{args.list_name or ENV_DEFAULT_LIST}'. "
-        "Fluxo: "
-        "1) Gere um TÍTULO curto e claro do card. "
-        "2) Redija uma DESCRIÇÃO TÉCNICA estruturada (bullets), com objetivos, entregáveis, critérios de aceite, riscos/notas de segurança. "
-        "3) Monte 1–3 CHECKLISTS com 4–10 itens cada, práticos e verificáveis (por área, ex. Planejamento/Backend/QA). "
-        "4) Se houver data/hora natural no texto do usuário ou passada separadamente, converta com 'to_rfc3339' e use como 'due'; se não houver, crie sem due. "
-        "5) Resolva 'idList' com 'resolve_list_id' usando board/lista fornecidos (mensagem/CLI) ou defaults. "
-        "6) Crie o card com 'trello_create_card' (inclua a descrição). "
-        "7) Crie os checklists com 'trello_add_checklist'. "
-        "Responda por fim SOMENTE a URL do card."
-    )
-
     # monta prompt do usuário
     user_prompt = args.prompt.strip()
     if args.due:
         # sugerimos explicitamente um due extra, mas o agente também consegue detectar do user_prompt
         user_prompt += f" | prazo: {args.due.strip()}"
 
-    # injeta, se o usuário quiser forçar board/list via CLI
-    if args.board:
-        user_prompt += f" | board: {args.board.strip()}"
-    if args.list_name:
-        user_prompt += f" | lista: {args.list_name.strip()}"
+    # board/lista entram aqui (e não na system) para manter o prefixo da
+    # system byte-idêntico entre runs
+    user_prompt += f" | board: {(args.board or ENV_DEFAULT_BOARD).strip()}"
+    user_prompt += f" | lista: {(args.list_name or ENV_DEFAULT_LIST).strip()}"
 
     messages = [
-        ("system", system_msg),
+        ("system", SYSTEM_MSG),
         ("user", user_prompt),
     ]
 
-    # executa
-    result = agent.invoke({"messages": messages})
-    print(result["messages"][-1].content)
+    # cache de specs: prompt repetido publica direto, sem passar pelo LLM
+    # (a key inclui o roteamento draft>principal: mudar modelos invalida)
+    cache_key = _spec_cache_key(f"{args.draft_model or ''}>{args.model}", SYSTEM_MSG, user_prompt)
+    cached = _spec_cache_get(cache_key)
+    if cached is not None:
+        print(await _publish_card(**cached))
+        return
+
+    # especulação: board/lista do run já são conhecidos antes do LLM responder,
+    # então a resolução (1 RTT ao Trello) roda em paralelo com o prefill e
+    # deixa o cache de listas quente para quando a ferramenta for chamada.
+    # (a conversão do due é CPU pura em microssegundos; não vale especular)
+    warmup = asyncio.create_task(
+        _resolve_board_and_list(args.board or "", args.list_name or "")
+    )
+    # falha especulativa não aborta o run; o tool call real reporta o erro ao
+    # agente (task cancelada — loop encerrando — não tem exceção a consumir)
+    warmup.add_done_callback(lambda t: t.exception() if not t.cancelled() else None)
+
+    # roteamento de modelo: gerar um card é tarefa simples, então tentamos
+    # primeiro o modelo rascunho (fração da latência do principal); se o run
+    # não publicar nada, repetimos com o modelo principal. O Ollama não expõe
+    # speculative decoding por token, então a especulação é no nível do run.
+    candidates = list(dict.fromkeys(m for m in (args.draft_model, args.model) if m))
+    final_text = ""
+    for i, model in enumerate(candidates):
+        agent = _build_agent(args, model)
+        try:
+            final_text = await _stream_agent(agent, messages, args.verbose)
+        except Exception as exc:
+            if _last_spec is not None:
+                # o card já foi publicado antes da falha (ex.: Ollama caiu na
+                # resposta final): repetir o loop duplicaria o card no board
+                if args.verbose:
+                    print(f"[fallback] '{model}' falhou após publicar ({exc}); usando o card já criado", file=sys.stderr)
+                break
+            # rascunho indisponível (ex.: modelo não baixado no Ollama) não
+            # aborta o run: cai para o próximo candidato; só o último propaga
+            if i + 1 >= len(candidates):
+                raise
+            if args.verbose:
+                print(f"[fallback] '{model}' falhou ({exc}); tentando '{candidates[i + 1]}'", file=sys.stderr)
+            continue
+        if _last_spec is not None or "trello.com" in final_text:
+            break
+        if args.verbose and i + 1 < len(candidates):
+            print(f"[fallback] '{model}' não publicou card; tentando '{candidates[i + 1]}'", file=sys.stderr)
+
+    if _last_spec is not None:
+        _spec_cache_put(cache_key, _last_spec)
+    # se o LLM morreu depois de publicar, a resposta final pode estar vazia;
+    # a URL guardada pelo publish ainda reporta o card criado
+    print(final_text or _last_card_url or "")
+
+async def _run() -> None:
+    """Executa main() e fecha o pool de conexões no mesmo event loop."""
+    try:
+        await main()
+    finally:
+        await _TRELLO.aclose()
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(_run())